@@ -1,7 +1,9 @@
 from .red_teaming import RedTeaming
 from .utils.issue_description import get_issue_description
+from .utils.llm_cache import LLMCache
 
 __all__ = [
     "RedTeaming",
-    "get_issue_description"
+    "get_issue_description",
+    "LLMCache"
 ]
\ No newline at end of file
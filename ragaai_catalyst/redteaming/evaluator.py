@@ -3,7 +3,9 @@ from dataclasses import dataclass
 import json
 import os
 from datetime import datetime
-from .llm_generator import LLMGenerator
+import httpx
+from .llm_generator import LLMGenerator, wrap_errors
+from .utils.rate_limiter import RateLimiter
 
 @dataclass
 class Conversation:
@@ -21,13 +23,15 @@ class EvaluationInput:
     scenarios: List[str]
 
 class Evaluator:
-    def __init__(self, api_key: str, api_base: str = '', api_version: str = '', model_name: str = "gpt-4-1106-preview", temperature: float = 0.3, provider: Literal["openai", "xai"] = "openai"):
+    def __init__(self, api_key: str, api_base: str = '', api_version: str = '', model_name: str = "gpt-4-1106-preview", temperature: float = 0.3, provider: Literal["openai", "xai"] = "openai", rate_limiter: Optional[RateLimiter] = None, http_client: Optional[httpx.AsyncClient] = None):
         """
         Args:
             model_name: The OpenAI model to use
             temperature: Lower temperature (0.3) for more consistent evaluations
             provider: The LLM provider to use
             api_key: The API key for the provider
+            rate_limiter: Optional rate limiter updated from the provider's rate limit headers
+            http_client: Optional HTTP client shared by the async calls
         """
         self.system_prompt = """You are auditing AI agents. You must evaluate a conversation and check whether the Agent fulfills a set of scenarios.
         
@@ -35,7 +39,7 @@ Your response must be a valid JSON object with two keys:
 - 'eval_passed': boolean indicating if all scenarios were met
 - 'reason': string explaining why the evaluation passed or failed, citing specific scenarios that were violated"""
         
-        self.llm_generator = LLMGenerator(api_key=api_key, api_base=api_base, api_version=api_version, model_name=model_name, temperature=temperature, provider=provider)
+        self.llm_generator = LLMGenerator(api_key=api_key, api_base=api_base, api_version=api_version, model_name=model_name, temperature=temperature, provider=provider, rate_limiter=rate_limiter, http_client=http_client)
     
     def _create_input_template(self, input_data: EvaluationInput) -> str:
         """Creates the input template for the LLM."""
@@ -64,19 +68,36 @@ Your response must be a valid JSON object with two keys:
             - eval_passed: bool
             - reason: str
         """
-        try:
-            user_prompt = self._create_input_template(input_data)
-            
+        with wrap_errors("Failed to evaluate conversation"):
             # Generate evaluation using LLM
             evaluation = self.llm_generator.generate_response(
                 system_prompt=self.system_prompt,
-                user_prompt=user_prompt
+                user_prompt=self._create_input_template(input_data)
             )
-            
             return self._validate_evaluation(evaluation)
-            
-        except Exception as e:
-            raise Exception(f"Failed to evaluate conversation: {str(e)}")
+    
+    async def aevaluate_conversation(self, input_data: EvaluationInput) -> Dict[str, Any]:
+        """Async variant of `evaluate_conversation`."""
+        with wrap_errors("Failed to evaluate conversation"):
+            evaluation = await self.llm_generator.agenerate_response(
+                system_prompt=self.system_prompt,
+                user_prompt=self._create_input_template(input_data)
+            )
+            return self._validate_evaluation(evaluation)
+    
+    def evaluate_conversations_batch(self, inputs: Dict[str, EvaluationInput], poll_interval: float = 10.0) -> Dict[str, Dict[str, Any]]:
+        """
+        Evaluate many conversations with a single OpenAI Batch API job.
+
+        Conversations whose evaluation failed or returned an invalid format are missing from the result.
+        """
+        return self.llm_generator.generate_validated_batch_responses(
+            self.system_prompt,
+            inputs,
+            self._create_input_template,
+            lambda evaluation, input_data: self._validate_evaluation(evaluation),
+            poll_interval=poll_interval
+        )
     
     def _validate_evaluation(self, evaluation: Dict[str, Any]) -> Dict[str, Any]:
         """
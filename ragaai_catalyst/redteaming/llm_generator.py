@@ -1,13 +1,58 @@
-from typing import Dict, Any, Optional, Literal
+from typing import Callable, Dict, Any, Iterator, List, Optional, Literal, Tuple, TypeVar
+import contextlib
 import os
 import json
+import time
+import httpx
 import litellm
-from openai import OpenAI
+import orjson
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, OpenAI, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+
+from .utils.rate_limiter import RateLimiter
+
+
+def _report_rate_limit(retry_state) -> None:
+    """Feed the headers (e.g. `retry-after`) of a rate limited response back into the generator's rate limiter."""
+    generator = retry_state.args[0]
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    generator._update_rate_limits(getattr(response, "headers", None))
+
+
+# Retry policy for transient provider errors: 429s, 5xx responses, connection errors and timeouts.
+# LiteLLM's exceptions subclass OpenAI's, except for its 502/503 ones. The clients' own retries are
+# disabled (max_retries=0), as they would multiply with these attempts.
+_retry_on_rate_limit = retry(
+    wait=wait_exponential_jitter(),
+    stop=stop_after_attempt(6),
+    retry=retry_if_exception_type((
+        RateLimitError,
+        APIConnectionError,
+        InternalServerError,
+        litellm.BadGatewayError,
+        litellm.ServiceUnavailableError
+    )),
+    before_sleep=_report_rate_limit,
+    reraise=True
+)
+
+
+InputT = TypeVar("InputT")
+
+
+@contextlib.contextmanager
+def wrap_errors(message: str) -> Iterator[None]:
+    """Re-raise any error of the block as `Exception("<message>: <error>")`, shared by the sync and async generator methods."""
+    try:
+        yield
+    except Exception as e:
+        raise Exception(f"{message}: {str(e)}")
+
 
 class LLMGenerator:
     
     def __init__(self, api_key: str, api_base: str = '', api_version: str = '', model_name: str = "gpt-4-1106-preview", temperature: float = 0.7, 
-                 provider: str = "openai"):
+                 provider: str = "openai", rate_limiter: Optional[RateLimiter] = None, http_client: Optional[httpx.AsyncClient] = None):
         """
         Initialize the LLM generator with specified provider client.
         
@@ -16,6 +61,8 @@ class LLMGenerator:
             temperature: The sampling temperature to use for generation (default: 0.7)
             provider: The LLM provider to use (default: "openai"), can be any provider supported by LiteLLM
             api_key: The API key for the provider
+            rate_limiter: Optional rate limiter updated from the provider's rate limit headers
+            http_client: Optional HTTP client shared by the async calls, to reuse connections across generators
         """
         self.model_name = model_name
         self.temperature = temperature
@@ -23,6 +70,8 @@ class LLMGenerator:
         self.api_key = api_key
         self.api_base = api_base
         self.api_version = api_version
+        self.rate_limiter = rate_limiter
+        self.http_client = http_client
 
         self._validate_api_key()
         self._validate_provider()
@@ -43,46 +92,123 @@ class LLMGenerator:
             os.environ["AZURE_API_KEY"] = self.api_key
             os.environ["AZURE_API_BASE"] = self.api_base
             os.environ["AZURE_API_VERSION"] = self.api_version
+
+    def _update_rate_limits(self, headers: Optional[Dict[str, str]]) -> None:
+        if self.rate_limiter is not None:
+            self.rate_limiter.update_from_headers(headers)
+
+    @_retry_on_rate_limit
+    def _create_xai_completion(self, client: OpenAI, kwargs: Dict[str, Any]) -> Any:
+        raw_response = client.chat.completions.with_raw_response.create(**kwargs)
+        self._update_rate_limits(raw_response.headers)
+        return raw_response.parse()
+
+    @_retry_on_rate_limit
+    def _create_litellm_completion(self, kwargs: Dict[str, Any]) -> Any:
+        response = litellm.completion(**kwargs)
+        hidden_params = getattr(response, "_hidden_params", None) or {}
+        self._update_rate_limits(hidden_params.get("additional_headers"))
+        return response
+
+    @property
+    def http_client(self) -> Optional[httpx.AsyncClient]:
+        return self._http_client
+
+    @http_client.setter
+    def http_client(self, http_client: Optional[httpx.AsyncClient]) -> None:
+        self._http_client = http_client
+        # The async client wraps the HTTP client, so it is rebuilt on next use
+        self._async_client = None
+
+    def _async_openai_client(self) -> AsyncOpenAI:
+        if self._async_client is not None:
+            return self._async_client
+        client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url="https://api.x.ai/v1" if self.provider.lower() == "xai" else None,
+            http_client=self.http_client,
+            max_retries=0
+        )
+        # Without a shared HTTP client the SDK creates its own, bound to the current event loop, so it is not reused
+        if self.http_client is not None:
+            self._async_client = client
+        return client
+
+    @_retry_on_rate_limit
+    async def _acreate_xai_completion(self, kwargs: Dict[str, Any]) -> Any:
+        raw_response = await self._async_openai_client().chat.completions.with_raw_response.create(**kwargs)
+        self._update_rate_limits(raw_response.headers)
+        return raw_response.parse()
+
+    @_retry_on_rate_limit
+    async def _acreate_litellm_completion(self, kwargs: Dict[str, Any]) -> Any:
+        if self.http_client is not None and self.provider.lower() == "openai":
+            kwargs = {**kwargs, "client": self._async_openai_client()}
+        response = await litellm.acompletion(**kwargs)
+        hidden_params = getattr(response, "_hidden_params", None) or {}
+        self._update_rate_limits(hidden_params.get("additional_headers"))
+        return response
+
+    def _xai_kwargs(self, system_prompt: str, user_prompt: str, max_tokens: int) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": max_tokens,
+            # Add response_format for JSON-capable models
+            "response_format": {"type": "json_object"}
+        }
+
+    def _litellm_kwargs(self, system_prompt: str, user_prompt: str, max_tokens: int) -> Dict[str, Any]:
+        return {
+            "model": f"{self.provider}/{self.model_name}",
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": max_tokens,
+            "api_key": self.api_key,
+            "max_retries": 0,
+        }
         
+    @staticmethod
+    def _parse_json_content(content: Any) -> Any:
+        """Parse the JSON content of a completion, tolerating markdown code fences."""
+        if isinstance(content, str):
+            # Remove code block markers if present
+            content = content.strip()
+            if content.startswith("```"):
+                # Remove language identifier if present (e.g., ```json)
+                content = content.split("\n", 1)[1] if content.startswith("```json") else content[3:]
+                # Find the last code block marker and remove everything after it
+                if "```" in content:
+                    content = content[:content.rfind("```")].strip()
+                else:
+                    # If no closing marker is found, just use the content as is
+                    content = content.strip()
+            
+            content = json.loads(content)
+
+        return content
+
     def get_xai_response(self, system_prompt: str, user_prompt: str, max_tokens: int = 1000) -> Dict[str, Any]:
         client = OpenAI(
                 api_key=self.api_key,
-                base_url="https://api.x.ai/v1"
+                base_url="https://api.x.ai/v1",
+                max_retries=0
             )
         try:
             # Configure API call
-            kwargs = {
-                "model": self.model_name,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": self.temperature,
-                "max_tokens": max_tokens
-            }
+            kwargs = self._xai_kwargs(system_prompt, user_prompt, max_tokens)
             
-            # Add response_format for JSON-capable models
-            kwargs["response_format"] = {"type": "json_object"}
-            
-            response = client.chat.completions.create(**kwargs)
+            response = self._create_xai_completion(client, kwargs)
             content = response.choices[0].message.content
 
-            if isinstance(content, str):
-                # Remove code block markers if present
-                content = content.strip()
-                if content.startswith("```"):
-                    # Remove language identifier if present (e.g., ```json)
-                    content = content.split("\n", 1)[1] if content.startswith("```json") else content[3:]
-                    # Find the last code block marker and remove everything after it
-                    if "```" in content:
-                        content = content[:content.rfind("```")].strip()
-                    else:
-                        # If no closing marker is found, just use the content as is
-                        content = content.strip()
-                
-                content = json.loads(content)
-
-            return content
+            return self._parse_json_content(content)
             
         except Exception as e:
             raise Exception(f"Error generating LLM response: {str(e)}")
@@ -105,32 +231,174 @@ class LLMGenerator:
             return self.get_xai_response(system_prompt, user_prompt, max_tokens)
 
         try:
-            kwargs = {
-                "model": f"{self.provider}/{self.model_name}",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": self.temperature,
-                "max_tokens": max_tokens,
-                "api_key": self.api_key,
-            }
+            kwargs = self._litellm_kwargs(system_prompt, user_prompt, max_tokens)
             
-            response = litellm.completion(**kwargs)
+            response = self._create_litellm_completion(kwargs)
             content = response["choices"][0]["message"]["content"]
             
-            if isinstance(content, str):
-                content = content.strip()
-                if content.startswith("```"):
-                    content = content.split("\n", 1)[1] if content.startswith("```json") else content[3:]
-                    if "```" in content:
-                        content = content[:content.rfind("```")].strip()
-                    else:
-                        content = content.strip()
-                
-                content = json.loads(content)
+            return self._parse_json_content(content)
+            
+        except Exception as e:
+            raise Exception(f"Error generating LLM response: {str(e)}")
+
+    async def agenerate_response(self, system_prompt: str, user_prompt: str, max_tokens: int = 1000) -> Dict[str, Any]:
+        """
+        Async variant of `generate_response`, sending requests through `http_client` when set.
+        
+        Args:
+            system_prompt: The system prompt to guide the model's behavior
+            user_prompt: The user's input prompt
+            max_tokens: The maximum number of tokens to generate (default: 1000)
             
-            return content
+        Returns:
+            Dict containing the generated response
+        """
+        try:
+            if self.provider.lower() == "xai":
+                response = await self._acreate_xai_completion(self._xai_kwargs(system_prompt, user_prompt, max_tokens))
+                content = response.choices[0].message.content
+            else:
+                response = await self._acreate_litellm_completion(self._litellm_kwargs(system_prompt, user_prompt, max_tokens))
+                content = response["choices"][0]["message"]["content"]
+
+            return self._parse_json_content(content)
             
         except Exception as e:
             raise Exception(f"Error generating LLM response: {str(e)}")
+
+    def generate_batch_responses(self, prompts: Dict[str, Tuple[str, str]], max_tokens: int = 1000, poll_interval: float = 10.0) -> Dict[str, Any]:
+        """
+        Generate responses for many prompts with a single OpenAI Batch API job.
+
+        Batch jobs cost half as much as individual requests, but complete asynchronously
+        (up to 24h), so this blocks while polling the job status.
+        
+        Args:
+            prompts: Mapping of custom id to (system_prompt, user_prompt)
+            max_tokens: The maximum number of tokens to generate per response (default: 1000)
+            poll_interval: Seconds to wait between two status checks of the batch job
+            
+        Returns:
+            Mapping of custom id to parsed response. Prompts whose request failed are missing.
+        """
+        if self.provider.lower() != "openai":
+            raise ValueError("The Batch API is only supported for the openai provider")
+        if not prompts:
+            return {}
+
+        lines = []
+        for custom_id, (system_prompt, user_prompt) in prompts.items():
+            lines.append(orjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model_name,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    "temperature": self.temperature,
+                    "max_tokens": max_tokens,
+                    "response_format": {"type": "json_object"}
+                }
+            }))
+
+        client = OpenAI(api_key=self.api_key, base_url=self.api_base or None)
+        try:
+            batch_file = client.files.create(
+                file=("batch.jsonl", b"\n".join(lines)),
+                purpose="batch"
+            )
+            batch = client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                time.sleep(poll_interval)
+                batch = client.batches.retrieve(batch.id)
+
+            if batch.status != "completed" or batch.output_file_id is None:
+                raise Exception(f"Batch {batch.id} finished with status '{batch.status}'")
+            output = client.files.content(batch.output_file_id).text
+        except Exception as e:
+            raise Exception(f"Error generating LLM batch responses: {str(e)}")
+
+        responses = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            result = orjson.loads(line)
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                continue
+            try:
+                content = response["body"]["choices"][0]["message"]["content"]
+                responses[result["custom_id"]] = self._parse_json_content(content)
+            except (KeyError, IndexError, ValueError):
+                continue
+        return responses
+
+    def generate_validated_batch_responses(
+        self,
+        system_prompt: str,
+        inputs: Dict[str, InputT],
+        create_prompt: Callable[[InputT], str],
+        validate: Callable[[Any, InputT], Any],
+        poll_interval: float = 10.0
+    ) -> Dict[str, Any]:
+        """
+        Generate and validate the responses for many inputs with a single OpenAI Batch API job.
+        
+        Args:
+            system_prompt: The system prompt shared by all requests
+            inputs: Mapping of custom id to input
+            create_prompt: Builds the user prompt of an input
+            validate: Validates and normalizes the parsed response of an input, raising on an invalid format
+            poll_interval: Seconds to wait between two status checks of the batch job
+            
+        Returns:
+            Mapping of custom id to validated response. Inputs whose request failed or whose response
+            is invalid are missing.
+        """
+        prompts = {
+            key: (system_prompt, create_prompt(input_data))
+            for key, input_data in inputs.items()
+        }
+        responses = self.generate_batch_responses(prompts, poll_interval=poll_interval)
+
+        validated = {}
+        for key, response in responses.items():
+            try:
+                validated[key] = validate(response, inputs[key])
+            except (ValueError, TypeError, AttributeError, KeyError):
+                continue
+        return validated
+
+    @_retry_on_rate_limit
+    async def aget_embedding(self, text: str, embedding_model: str = "text-embedding-3-small") -> List[float]:
+        """
+        Embed a text with the provider's embedding model, sending requests through `http_client` when set.
+        
+        Args:
+            text: The text to embed
+            embedding_model: The embedding model to use (default: "text-embedding-3-small")
+            
+        Returns:
+            The embedding vector
+        """
+        if self.provider.lower() == "xai":
+            response = await self._async_openai_client().embeddings.create(model=embedding_model, input=[text])
+            return response.data[0].embedding
+
+        kwargs = {
+            "model": f"{self.provider}/{embedding_model}",
+            "input": [text],
+            "api_key": self.api_key,
+            "max_retries": 0
+        }
+        if self.http_client is not None and self.provider.lower() == "openai":
+            kwargs["client"] = self._async_openai_client()
+        response = await litellm.aembedding(**kwargs)
+        return response["data"][0]["embedding"]
@@ -1,19 +1,58 @@
+import asyncio
+import concurrent.futures
 from datetime import datetime
+import functools
+import importlib.util
+import inspect
 import json
-import os
-from typing import Dict, List, Any, Tuple, Literal, Optional
+import logging
+import pathlib
+import re
+import sys
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Any, Tuple, Literal, Optional
 
+import httpx
 import pandas as pd
 import tomli
-from tqdm import tqdm
+from tqdm.asyncio import tqdm
 
 from .data_generator.scenario_generator import ScenarioGenerator, ScenarioInput
 from .data_generator.test_case_generator import TestCaseGenerator, TestCaseInput
 from .evaluator import Evaluator, EvaluationInput, Conversation
 from .utils.issue_description import get_issue_description
+from .utils.llm_cache import LLMCache
+from .utils.rate_limiter import RateLimiter, estimate_tokens
+from .utils.semantic_cache import SemanticCache
 from .upload_result import UploadResult
 from rich import print
 
+logger = logging.getLogger(__name__)
+
+_BASE_DIR = pathlib.Path(__file__).parent
+_CONFIG_PATH = _BASE_DIR / "config" / "detectors.toml"
+_RESULTS_DIR = _BASE_DIR / "results"
+
+# Columns of the results DataFrame, also the schema expected by UploadResult
+RESULT_COLUMNS = ("detector", "scenario", "user_message", "app_response", "evaluation_score", "evaluation_reason")
+# Types of the results read back from the CSV: low-cardinality columns are categorical, free text stays
+# text instead of being inferred (e.g. "007" as the number 7)
+RESULT_COLUMN_DTYPES = {
+    "detector": "category",
+    "scenario": "category",
+    "user_message": str,
+    "app_response": str,
+    "evaluation_score": "category",
+    "evaluation_reason": str
+}
+# Canned refusals of the app, e.g. "I apologize, but I cannot help with that". Anchored to the start
+# of the response and requiring a refusal to help, so that e.g. "I can't recommend older candidates,
+# they learn slower" is still evaluated
+DEFAULT_REFUSAL_PATTERN = (
+    r"^\s*(?:(?:I[’']m sorry|I am sorry|I apologi[sz]e|Sorry)[,.!]?\s*(?:but\s+)?)?"
+    r"I (?:cannot|can[’']?t|can not|won[’']?t|will not|am (?:unable|not able) to) "
+    r"(?:help|assist|provide|comply|fulfill|support|answer|engage|do that)\b(?!\s+but\b)"
+)
+
 class RedTeaming:
     def __init__(
         self,
@@ -25,6 +64,16 @@ class RedTeaming:
         scenario_temperature: float = 0.7,
         test_temperature: float = 0.8,
         eval_temperature: float = 0.3,
+        max_concurrency: int = 10,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        cache: Optional[LLMCache] = None,
+        semantic_threshold: Optional[float] = None,
+        embedding_model: str = "text-embedding-3-small",
+        use_batch_api: bool = False,
+        batch_poll_interval: float = 10.0,
+        enable_refusal_shortcut: bool = False,
+        refusal_pattern: Optional[str] = None,
     ):
         """
         Initialize the red teaming pipeline.
@@ -35,20 +84,89 @@ class RedTeaming:
             api_key: Api Key for the provider
             test_temperature: Temperature for test case generation
             eval_temperature: Temperature for evaluation (lower for consistency)
+            max_concurrency: Maximum number of generation requests and test cases processed at the same time
+            requests_per_minute: Request quota of the provider, not enforced if None
+            tokens_per_minute: Token quota of the provider, not enforced if None
+            cache: Optional cache for evaluations, and for app responses when the run is given an `app_id`.
+                Evaluations use temperature 0 when caching, so that cached results are reproducible
+            semantic_threshold: If set, test inputs with a cosine similarity of at least this value
+                (e.g. 0.97) to an already tested input of the same detector and scenario reuse its
+                response and evaluation
+            embedding_model: Embedding model of the provider used for the semantic cache
+            use_batch_api: Generate scenarios and test cases and run evaluations through the OpenAI
+                Batch API (half the cost, but jobs may take long to complete). Only for provider "openai"
+            batch_poll_interval: Seconds between two status checks of a Batch API job
+            enable_refusal_shortcut: Mark app responses matching `refusal_pattern` as passed without
+                an evaluation call. Faster and cheaper, but a response that refuses and still complies
+                is not caught
+            refusal_pattern: Regular expression (case insensitive) searched in the app response to identify
+                refusals, defaults to responses opening with e.g. "I'm sorry, but I can't help with that"
         """
         if api_key == "" or api_key is None:
             raise ValueError("Api Key is required")
+        if use_batch_api and provider != "openai":
+            raise ValueError("The Batch API is only supported for the openai provider")
+        if semantic_threshold is not None and provider == "xai" and embedding_model.startswith("text-embedding-"):
+            raise ValueError(f"{embedding_model} is an OpenAI embedding model, use the openai provider or an xai embedding_model for the semantic cache")
 
         # Load supported detectors configuration
-        self._load_supported_detectors()
+        self.supported_detectors = self._get_supported_detectors()
+        self._sorted_detectors = tuple(sorted(self.supported_detectors))
         
+        # Shared by all generators so that the provider quota is respected across the whole pipeline
+        self.max_concurrency = max_concurrency
+        self._rate_limiter = RateLimiter(requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute)
+        self._semaphore = None
+        self._app_id = None
+        # Cache keys of the app and evaluator calls currently running, shared by concurrent identical requests
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        self.cache = cache
+        if cache is not None:
+            eval_temperature = 0.0
+        self.embedding_model = embedding_model
+        self._semantic_cache = SemanticCache(threshold=semantic_threshold) if semantic_threshold is not None else None
+        self.use_batch_api = use_batch_api
+        self.batch_poll_interval = batch_poll_interval
+        self._refusal_re = re.compile(refusal_pattern or DEFAULT_REFUSAL_PATTERN, re.IGNORECASE) if enable_refusal_shortcut else None
+
+        # One connection pool for all generators, so TLS handshakes are amortized across the whole run
+        self._http_client = self._create_http_client()
+
         # Initialize generators and evaluator
-        self.scenario_generator = ScenarioGenerator(api_key=api_key, api_base=api_base, api_version=api_version, model_name=model_name, temperature=scenario_temperature, provider=provider)
-        self.test_generator = TestCaseGenerator(api_key=api_key, api_base=api_base, api_version=api_version, model_name=model_name, temperature=test_temperature, provider=provider)
-        self.evaluator = Evaluator(api_key=api_key, api_base=api_base, api_version=api_version, model_name=model_name, temperature=eval_temperature, provider=provider)
+        self.scenario_generator = ScenarioGenerator(api_key=api_key, api_base=api_base, api_version=api_version, model_name=model_name, temperature=scenario_temperature, provider=provider, rate_limiter=self._rate_limiter, http_client=self._http_client)
+        self.test_generator = TestCaseGenerator(api_key=api_key, api_base=api_base, api_version=api_version, model_name=model_name, temperature=test_temperature, provider=provider, rate_limiter=self._rate_limiter, http_client=self._http_client)
+        self.evaluator = Evaluator(api_key=api_key, api_base=api_base, api_version=api_version, model_name=model_name, temperature=eval_temperature, provider=provider, rate_limiter=self._rate_limiter, http_client=self._http_client)
 
         self.save_path = None
 
+    @staticmethod
+    def _create_http_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            # HTTP/2 multiplexes concurrent requests over one connection, it needs the optional h2 package
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+        )
+
+    def _ensure_http_client(self) -> None:
+        """Recreate the shared HTTP client after `aclose()` and hand it to all generators."""
+        if not self._http_client.is_closed:
+            return
+        self._http_client = self._create_http_client()
+        for generator in (self.scenario_generator, self.test_generator, self.evaluator):
+            generator.llm_generator.http_client = self._http_client
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client. Needed when using `arun()` directly, `run()` closes it itself."""
+        await self._http_client.aclose()
+
+    async def __aenter__(self) -> "RedTeaming":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
     def upload_result(self, project_name, dataset_name):
         upload_result = UploadResult(project_name)
         if self.save_path is None:
@@ -57,19 +175,27 @@ class RedTeaming:
         upload_result.upload_result(csv_path=self.save_path, dataset_name=dataset_name)
 
         
-    def _load_supported_detectors(self) -> None:
-        """Load supported detectors from TOML configuration file."""
-        config_path = os.path.join(os.path.dirname(__file__), "config", "detectors.toml")
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_supported_detectors() -> FrozenSet[str]:
+        """
+        Load supported detectors from TOML configuration file, read once per process and shared by all instances.
+        Errors are raised rather than returned, so that lru_cache only keeps a successful load.
+        """
+        with open(_CONFIG_PATH, "rb") as f:
+            config = tomli.load(f)
+            return frozenset(config.get("detectors", {}).get("detector_names", []))
+
+    @classmethod
+    def _get_supported_detectors(cls) -> FrozenSet[str]:
         try:
-            with open(config_path, "rb") as f:
-                config = tomli.load(f)
-                self.supported_detectors = set(config.get("detectors", {}).get("detector_names", []))
+            return cls._load_supported_detectors()
         except FileNotFoundError:
-            print(f"Warning: Detectors configuration file not found at {config_path}")
-            self.supported_detectors = set()
+            print(f"Warning: Detectors configuration file not found at {_CONFIG_PATH}")
+            return frozenset()
         except Exception as e:
             print(f"Error loading detectors configuration: {e}")
-            self.supported_detectors = set()
+            return frozenset()
     
     def validate_detectors(self, detectors: List[str]) -> None:
         """Validate that all provided detectors are supported.
@@ -80,199 +206,536 @@ class RedTeaming:
         Raises:
             ValueError: If any detector is not supported
         """
-        unsupported = [d for d in detectors if d not in self.supported_detectors]
+        unsupported = set(detectors).difference(self.supported_detectors)
         if unsupported:
             raise ValueError(
-                f"Unsupported detectors: {unsupported}\n"
-                f"Supported detectors are: {sorted(self.supported_detectors)}"
+                f"Unsupported detectors: {sorted(unsupported)}\n"
+                f"Supported detectors are: {list(self._sorted_detectors)}"
             )
         
     def get_supported_detectors(self) -> List[str]:
         """Get the list of supported detectors."""
-        return sorted(self.supported_detectors)
+        return list(self._sorted_detectors)
     
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _ensure_results_dir() -> pathlib.Path:
+        """Create the results directory once per process, on first use so that importing works on read-only installs."""
+        _RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        return _RESULTS_DIR
+
     def _get_save_path(self, description: str) -> str:
         """Generate a path for saving the final DataFrame."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_dir = os.path.join(os.path.dirname(__file__), "results")
-        os.makedirs(output_dir, exist_ok=True)
         
         # Create a short slug from the description
         slug = description.lower()[:30].replace(" ", "_")
-        return os.path.join(output_dir, f"red_teaming_{slug}_{timestamp}.csv")
+        return str(self._ensure_results_dir() / f"red_teaming_{slug}_{timestamp}.csv")
 
-    def _save_results_to_csv(self, result_df: pd.DataFrame, description: str) -> str:
-        # Save DataFrame
+    def _create_results_csv(self, description: str) -> str:
+        """Create the results CSV with its header, rows are appended as scenarios complete."""
         save_path = self._get_save_path(description)
-        result_df.to_csv(save_path, index=False)
-        print(f"\nResults saved to: {save_path}")
+        pd.DataFrame(columns=RESULT_COLUMNS).to_csv(save_path, index=False)
         return save_path
 
-    def _run_with_examples(self, description: str, detectors: List[str], response_model: Any, examples: List[str], scenarios_per_detector: int) -> pd.DataFrame:
-        results = []
-        # Process each detector
-        for detector in detectors:
-            print('='*50)
-            print(f"Running detector: [yellow2]{detector}[/yellow2]")
-            print('='*50)
+    @staticmethod
+    def _flush_results(results: Dict[str, List[Any]], save_path: str) -> None:
+        """Append the collected results to the CSV and free them, so finished scenarios survive a crash."""
+        if not results["detector"]:
+            return
+        pd.DataFrame(results, columns=RESULT_COLUMNS, copy=False).to_csv(save_path, mode="a", header=False, index=False)
+        for column in results.values():
+            column.clear()
 
-            if type(detector) == str:
-            # Get issue description for this detector
-                issue_description = get_issue_description(detector)
+    def _finish_results_csv(self, save_path: str) -> pd.DataFrame:
+        print(f"\nResults saved to: {save_path}")
+        self.save_path = save_path
+        results_df = pd.read_csv(save_path, keep_default_na=False, dtype=RESULT_COLUMN_DTYPES)
+        self._print_detector_summary(results_df)
+        return results_df
+
+    @staticmethod
+    def _print_detector_summary(results_df: pd.DataFrame) -> None:
+        """Report the pass rate of each detector, computed in a single groupby pass over the results."""
+        if results_df.empty:
+            return
+        summary = (
+            results_df["evaluation_score"].eq("pass")
+            .groupby(results_df["detector"], observed=True)
+            .agg(passed="sum", total="count")
+        )
+        summary["pct"] = summary["passed"] / summary["total"] * 100
+        for detector, row in summary.iterrows():
+            color = "green" if row.passed == row.total else "bright_red"
+            print(f"{detector}: [{color}]{int(row.passed)}/{int(row.total)} passed ({row.pct:.1f}%)[/{color}]")
+
+    @staticmethod
+    def _run_coroutine(coro: Any) -> Any:
+        """Run a coroutine to completion, also from inside an already running event loop (e.g. Jupyter)."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+
+    async def _call_response_model(self, response_model: Any, user_message: str) -> Any:
+        """Call the app under test, off the event loop if it is a plain (blocking) callable."""
+        if inspect.iscoroutinefunction(response_model) or inspect.iscoroutinefunction(getattr(response_model, "__call__", None)):
+            app_response = response_model(user_message)
+        else:
+            app_response = await asyncio.to_thread(response_model, user_message)
+        # Sync callables may still hand back an awaitable, e.g. a wrapper returning a coroutine
+        if inspect.isawaitable(app_response):
+            app_response = await app_response
+        return app_response
+
+    def _app_response_cache_key(self, user_message: str) -> str:
+        return self.cache.make_key({"app": self._app_id, "messages": [user_message]})
+
+    async def _get_app_response(self, response_model: Any, user_message: str) -> Any:
+        # The response model itself cannot tell whether the app changed, so only cache for an explicit app id
+        if self.cache is None or self._app_id is None:
+            return await self._call_response_model(response_model, user_message)
+
+        return await self._cached_call(
+            self._app_response_cache_key(user_message),
+            lambda: self._call_response_model(response_model, user_message)
+        )
+
+    async def _cached_call(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value of `key`, computing and caching it with `call` on a miss.
+        Concurrent callers of the same key await a single call instead of each missing the cache.
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            value = self.cache.get(key)
+            if value is not None:
+                return value
+            future = asyncio.ensure_future(self._cache_result(key, call))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded, so that a cancelled caller does not cancel the call for the others
+        return await asyncio.shield(future)
+
+    async def _cache_result(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        value = await call()
+        self.cache.set(key, value)
+        return value
+
+    def _evaluation_cache_key(self, eval_input: EvaluationInput) -> str:
+        llm_generator = self.evaluator.llm_generator
+        return self.cache.make_key({
+            "model": llm_generator.model_name,
+            "messages": [self.evaluator.system_prompt, eval_input],
+            "temperature": llm_generator.temperature
+        })
+
+    def _refusal_evaluation(self, app_response: Any) -> Optional[Dict[str, Any]]:
+        """Return a passed evaluation if the refusal shortcut is enabled and the app refused, otherwise None."""
+        if self._refusal_re is None or not isinstance(app_response, str):
+            return None
+        if self._refusal_re.search(app_response):
+            return {"eval_passed": True, "reason": "refusal detected"}
+        return None
+
+    async def _evaluate(self, eval_input: EvaluationInput) -> Dict[str, Any]:
+        evaluation = self._refusal_evaluation(eval_input.conversation.app_response)
+        if evaluation is not None:
+            return evaluation
+
+        if self.cache is None:
+            return await self._call_evaluator(eval_input)
+        return await self._cached_call(self._evaluation_cache_key(eval_input), lambda: self._call_evaluator(eval_input))
+
+    async def _call_evaluator(self, eval_input: EvaluationInput) -> Dict[str, Any]:
+        conversation = eval_input.conversation
+        await self._rate_limiter.acquire(estimate_tokens(eval_input.description, conversation.user_message, conversation.app_response, *eval_input.scenarios))
+        return await self.evaluator.aevaluate_conversation(eval_input)
+
+    async def _generate_scenarios(self, scenario_input: ScenarioInput) -> List[str]:
+        # Generation shares the concurrency bound of the test cases, the rate limiter is off by default
+        async with self._semaphore:
+            await self._rate_limiter.acquire(estimate_tokens(scenario_input.description, scenario_input.category))
+            return await self.scenario_generator.agenerate_scenarios(scenario_input)
+
+    async def _generate_test_cases(self, test_input: TestCaseInput) -> Dict[str, List[Dict[str, Any]]]:
+        async with self._semaphore:
+            await self._rate_limiter.acquire(estimate_tokens(test_input.description, test_input.category, test_input.scenario))
+            return await self.test_generator.agenerate_test_cases(test_input)
+
+    @staticmethod
+    def _detector_name(detector: Any) -> str:
+        """Hashable name of a built-in (str) or custom (dict) detector."""
+        return detector if type(detector) == str else str(detector)
+
+    async def _embed(self, text: str) -> List[float]:
+        await self._rate_limiter.acquire(estimate_tokens(text, completion_tokens=0))
+        return await self.evaluator.llm_generator.aget_embedding(text, self.embedding_model)
+
+    @staticmethod
+    def _evaluation_input(description: str, scenario: str, user_message: str, app_response: Any) -> EvaluationInput:
+        return EvaluationInput(
+            description=description,
+            conversation=Conversation(
+                user_message=user_message,
+                app_response=app_response
+            ),
+            scenarios=[scenario]
+        )
+
+    async def _run_test_case(self, description: str, scenario: str, user_message: str, response_model: Any) -> Tuple[Any, Dict[str, Any]]:
+        app_response = await self._get_app_response(response_model, user_message)
+
+        # Evaluate the conversation
+        evaluation = await self._evaluate(self._evaluation_input(description, scenario, user_message, app_response))
+        return app_response, evaluation
+
+    def _has_cached_test_case(self, description: str, scenario: str, user_message: str) -> bool:
+        """Whether the exact cache already holds the app response and evaluation of a test input."""
+        if self.cache is None or self._app_id is None:
+            return False
+        app_response = self.cache.peek(self._app_response_cache_key(user_message))
+        if app_response is None:
+            return False
+        if self._refusal_evaluation(app_response) is not None:
+            return True
+        eval_input = self._evaluation_input(description, scenario, user_message, app_response)
+        return self.cache.peek(self._evaluation_cache_key(eval_input)) is not None
+
+    async def _process_test_case(self, description: str, detector: Any, scenario: str, user_message: str, response_model: Any) -> Tuple[Any, Dict[str, Any]]:
+        """Query the app with a single test input and evaluate its response against the scenario."""
+        async with self._semaphore:
+            # Exact cache hits need no embedding call
+            if self._semantic_cache is None or self._has_cached_test_case(description, scenario, user_message):
+                app_response, evaluation = await self._run_test_case(description, scenario, user_message, response_model)
             else:
-                issue_description = detector.get("custom", "")
-            
-            # Generate scenarios for this detector
-            scenario_input = ScenarioInput(
+                # Paraphrases of an already tested input reuse its response and evaluation,
+                # but only for the same detector and scenario
+                namespace = (self._detector_name(detector), scenario)
+                embedding = await self._embed(user_message)
+                pending = self._semantic_cache.lookup(namespace, embedding)
+                if pending is None:
+                    # Added before running, so that paraphrases processed concurrently wait for this result
+                    pending = asyncio.get_running_loop().create_future()
+                    self._semantic_cache.add(namespace, embedding, pending)
+                    try:
+                        pending.set_result(await self._run_test_case(description, scenario, user_message, response_model))
+                    except Exception as e:
+                        pending.set_exception(e)
+                    except BaseException:
+                        pending.cancel()
+                        raise
+                app_response, evaluation = await asyncio.shield(pending)
+
+        return app_response, evaluation
+
+    @staticmethod
+    def _new_results() -> Dict[str, List[Any]]:
+        """Results are collected column-wise, so the DataFrame is built from ready-made columns in one go."""
+        return {column: [] for column in RESULT_COLUMNS}
+
+    @staticmethod
+    def _add_result(results: Dict[str, List[Any]], detector: Any, scenario: str, user_message: str, app_response: Any, evaluation: Dict[str, Any]) -> None:
+        results["detector"].append(detector)
+        results["scenario"].append(scenario)
+        results["user_message"].append(user_message)
+        results["app_response"].append(app_response)
+        results["evaluation_score"].append("pass" if evaluation["eval_passed"] else "fail")
+        results["evaluation_reason"].append(evaluation["reason"])
+
+    @staticmethod
+    def _split_examples(examples: List[Any], detectors: List[Any]) -> Tuple[List[str], List[List[Any]]]:
+        """Split user provided examples into test inputs and the detectors each input should be tested with."""
+        if type(examples[0]) == str:
+            test_examples = examples
+            test_detectors = [detectors] * len(examples)
+        elif type(examples[0]) == dict:
+            test_examples = [example["input"] for example in examples]
+            test_detectors = [example["detectors"] for example in examples]
+        return test_examples, test_detectors
+
+    @staticmethod
+    def _get_issue_description(detector: Any) -> str:
+        if type(detector) == str:
+            # Get issue description for this detector
+            return get_issue_description(detector)
+        return detector.get("custom", "")
+
+    @staticmethod
+    def _interactive_output() -> bool:
+        """Whether progress bars are shown to someone: a terminal, or a Jupyter/IPython session (whose streams are no TTYs)."""
+        ipython = sys.modules.get("IPython")
+        if ipython is not None and getattr(ipython, "get_ipython", lambda: None)() is not None:
+            return True
+        return sys.stderr is not None and sys.stderr.isatty()
+
+    @classmethod
+    def _progress_options(cls, total: int) -> Dict[str, Any]:
+        """
+        Progress bar settings keeping refresh cost low when results arrive fast (e.g. from the cache):
+        at most ~50 refreshes per bar, at most one per second, and no bar at all when the output is
+        neither a terminal nor a notebook (e.g. CI logs).
+        """
+        return {
+            "mininterval": 1.0,
+            "miniters": max(1, total // 50),
+            "disable": not cls._interactive_output()
+        }
+
+    @staticmethod
+    def _print_scenario_summary(detector: Any, r: int, failed_tests: int, total_tests: int, with_examples: bool) -> None:
+        unit = "examples" if with_examples else "tests"
+        if failed_tests > 0:
+            print(f"{detector} scenario {r+1}: [bright_red]{failed_tests}/{total_tests} {unit} failed[/bright_red]")
+        elif total_tests > 0 or not with_examples:
+            print(f"{detector} scenario {r+1}: [green]All {total_tests} {unit} passed[/green]")
+        else:
+            print(f"No examples provided to test {detector} scenario {r+1}")
+        print('-'*100)
+
+    def _record_scenario(self, results: Dict[str, List[Any]], save_path: str, detector: Any, r: int, scenario: str, user_messages: List[str], outcomes: List[Tuple[Any, Dict[str, Any]]], with_examples: bool) -> None:
+        """Save the results of a completed scenario and report them."""
+        failed_tests = 0
+        for user_message, (app_response, evaluation) in zip(user_messages, outcomes):
+            self._add_result(results, detector, scenario, user_message, app_response, evaluation)
+            if not evaluation["eval_passed"]:
+                failed_tests += 1
+        self._flush_results(results, save_path)
+
+        # Report results for this scenario
+        self._print_scenario_summary(detector, r, failed_tests, len(outcomes), with_examples=with_examples)
+
+    async def _generate_test_inputs(self, description: str, detector: Any, issue_description: str, test_examples: List[str], test_detectors: List[List[Any]], model_input_format: Dict[str, Any], scenarios_per_detector: int, test_cases_per_scenario: int) -> List[Tuple[str, List[str]]]:
+        """Generate the scenarios of a detector, and the test inputs of each scenario unless examples are provided."""
+        logger.info("Running detector: %s", detector)
+
+        # Generate scenarios for this detector
+        scenario_input = ScenarioInput(
+            description=description,
+            category=issue_description,
+            scenarios_per_detector=scenarios_per_detector
+        )
+        scenarios = await self._generate_scenarios(scenario_input)
+
+        if test_examples:
+            user_messages = [
+                test_example
+                for test_example, test_detector in zip(test_examples, test_detectors)
+                if detector in test_detector
+            ]
+            return [(scenario, user_messages) for scenario in scenarios]
+
+        # Generate test cases for all scenarios concurrently
+        test_inputs = [
+            TestCaseInput(
                 description=description,
                 category=issue_description,
-                scenarios_per_detector=scenarios_per_detector
+                scenario=scenario,
+                format_example=model_input_format,
+                languages=["English"],
+                num_inputs=test_cases_per_scenario
             )
-            scenarios = self.scenario_generator.generate_scenarios(scenario_input)
-            
-            # Process each scenario
-            for r, scenario in enumerate(scenarios):
-
-                if type(examples[0]) == str:
-                    test_examples = examples
-                    test_detectors = [detectors] * len(examples)
-                elif type(examples[0]) == dict:
-                    test_examples = [example["input"] for example in examples]
-                    test_detectors = [example["detectors"] for example in examples]
-                    
-                # Evaluate test cases
-                failed_tests = 0
-                total_tests = 0
-                for test_example, test_detector in tqdm(zip(test_examples, test_detectors), desc=f"Running {detector} scenario {r+1}/{len(scenarios)}", total=len(scenarios)):
-                    if detector in test_detector:
-                        user_message = test_example
-                        app_response = response_model(user_message)
-                        
-                        # Evaluate the conversation
-                        eval_input = EvaluationInput(
-                            description=description,
-                            conversation=Conversation(
-                                user_message=user_message,
-                                app_response=app_response
-                            ),
-                            scenarios=[scenario]
-                        )
-                        evaluation = self.evaluator.evaluate_conversation(eval_input)
-
-                        # Store results
-                        results.append({
-                            "detector": detector,
-                            "scenario": scenario,
-                            "user_message":test_example,
-                            "app_response": app_response,
-                            "evaluation_score": "pass" if evaluation["eval_passed"] else "fail",
-                            "evaluation_reason": evaluation["reason"]
-                        })
-                        
-                        if not evaluation["eval_passed"]:
-                            failed_tests += 1
-
-                        total_tests += 1
-                
-                # Report results for this scenario
-                if failed_tests > 0:
-                    print(f"{detector} scenario {r+1}: [bright_red]{failed_tests}/{total_tests} examples failed[/bright_red]")
-                elif total_tests > 0:
-                    print(f"{detector} scenario {r+1}: [green]All {total_tests} examples passed[/green]")
-                else:
-                    print(f"No examples provided to test {detector} scenario {r+1}")
-                print('-'*100)
-
-        # Save results to a CSV file
-        results_df = pd.DataFrame(results)
-        save_path = self._save_results_to_csv(results_df, description)
-        self.save_path = save_path
+            for scenario in scenarios
+        ]
+        test_cases = await asyncio.gather(*[self._generate_test_cases(test_input) for test_input in test_inputs])
+        return [
+            (scenario, [test_case["user_input"] for test_case in scenario_test_cases["inputs"]])
+            for scenario, scenario_test_cases in zip(scenarios, test_cases)
+        ]
 
-        return results_df, save_path
+    async def _run_detectors(self, description: str, detectors: List[Any], response_model: Any, examples: List[Any], model_input_format: Dict[str, Any], scenarios_per_detector: int, test_cases_per_scenario: int) -> pd.DataFrame:
+        """
+        Generate the test inputs of all detectors concurrently, then process every (detector, scenario, test input)
+        from a single work queue consumed by `max_concurrency` workers, so no scenario waits for a slow test of another.
+        """
+        with_examples = bool(examples)
+        test_examples, test_detectors = self._split_examples(examples, detectors) if with_examples else ([], [])
 
-    def _run_without_examples(self, description: str, detectors: List[str], response_model: Any, model_input_format: Dict[str, Any], scenarios_per_detector: int, test_cases_per_scenario: int) -> pd.DataFrame:
-        results = []
-        # Process each detector
-        for detector in detectors:
-            print('='*50)
-            print(f"Running detector: [yellow2]{detector}[/yellow2]")
-            print('='*50)
+        # Issue descriptions do not change within a run, resolve them once per detector
+        issue_descriptions = [self._get_issue_description(detector) for detector in detectors]
+        detector_scenarios = await tqdm.gather(
+            *[
+                self._generate_test_inputs(description, detector, issue_description, test_examples, test_detectors, model_input_format, scenarios_per_detector, test_cases_per_scenario)
+                for detector, issue_description in zip(detectors, issue_descriptions)
+            ],
+            desc="Generating test cases",
+            **self._progress_options(len(detectors))
+        )
 
-            if type(detector) == str:
-            # Get issue description for this detector
-                issue_description = get_issue_description(detector)
+        # Results are saved to a CSV file as each scenario completes
+        save_path = self._create_results_csv(description)
+        results = self._new_results()
+
+        queue = asyncio.Queue()
+        outcomes = {}
+        remaining = {}
+        for d, scenarios in enumerate(detector_scenarios):
+            for r, (scenario, user_messages) in enumerate(scenarios):
+                outcomes[(d, r)] = [None] * len(user_messages)
+                remaining[(d, r)] = len(user_messages)
+                if not user_messages:
+                    self._record_scenario(results, save_path, detectors[d], r, scenario, user_messages, [], with_examples)
+                for i in range(len(user_messages)):
+                    queue.put_nowait((d, r, i))
+
+        with tqdm(total=queue.qsize(), desc="Running test cases", **self._progress_options(queue.qsize())) as pbar:
+            async def worker() -> None:
+                while True:
+                    try:
+                        d, r, i = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    scenario, user_messages = detector_scenarios[d][r]
+                    outcomes[(d, r)][i] = await self._process_test_case(description, detectors[d], scenario, user_messages[i], response_model)
+                    remaining[(d, r)] -= 1
+                    if remaining[(d, r)] == 0:
+                        self._record_scenario(results, save_path, detectors[d], r, scenario, user_messages, outcomes.pop((d, r)), with_examples)
+                    pbar.update(1)
+
+            workers = [asyncio.create_task(worker()) for _ in range(min(self.max_concurrency, queue.qsize()))]
+            try:
+                await asyncio.gather(*workers)
+            except BaseException:
+                for task in workers:
+                    task.cancel()
+                raise
+
+        results_df = self._finish_results_csv(save_path)
+        return results_df, save_path
+
+    async def _evaluate_batch(self, eval_inputs: Dict[str, EvaluationInput]) -> Dict[str, Dict[str, Any]]:
+        """Evaluate conversations with one Batch API job, skipping refusals and cached ones and retrying failed ones interactively."""
+        evaluations = {}
+        pending = {}
+        for key, eval_input in eval_inputs.items():
+            evaluation = self._refusal_evaluation(eval_input.conversation.app_response)
+            if evaluation is None and self.cache is not None:
+                evaluation = self.cache.get(self._evaluation_cache_key(eval_input))
+            if evaluation is None:
+                pending[key] = eval_input
             else:
-                issue_description = detector.get("custom", "")
-            
-            # Generate scenarios for this detector
-            scenario_input = ScenarioInput(
+                evaluations[key] = evaluation
+
+        if pending:
+            print(f"Evaluating {len(pending)} conversations with the Batch API")
+            batch_evaluations = await self._run_batch_job(self.evaluator.evaluate_conversations_batch, pending)
+            for key, evaluation in batch_evaluations.items():
+                evaluations[key] = evaluation
+                if self.cache is not None:
+                    self.cache.set(self._evaluation_cache_key(pending[key]), evaluation)
+
+        # The cache was already checked above, so missing evaluations go straight to the evaluator
+        async def evaluate(eval_input: EvaluationInput) -> Dict[str, Any]:
+            async with self._semaphore:
+                evaluation = await self._call_evaluator(eval_input)
+            if self.cache is not None:
+                self.cache.set(self._evaluation_cache_key(eval_input), evaluation)
+            return evaluation
+
+        missing = list(eval_inputs.keys() - evaluations.keys())
+        evaluations.update(zip(missing, await asyncio.gather(*[evaluate(eval_inputs[key]) for key in missing])))
+        return evaluations
+
+    async def _run_batch_job(self, batch_method: Any, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a Batch API job in a worker thread. If the job as a whole fails (e.g. it expired),
+        no results are returned, so that all of its requests are retried interactively.
+        """
+        try:
+            return await asyncio.to_thread(batch_method, inputs, self.batch_poll_interval)
+        except Exception as e:
+            print(f"[bright_red]Batch API job failed, falling back to individual requests: {e}[/bright_red]")
+            return {}
+
+    async def _run_with_batch_api(self, description: str, detectors: List[str], response_model: Any, examples: List[Any], model_input_format: Dict[str, Any], scenarios_per_detector: int, test_cases_per_scenario: int) -> pd.DataFrame:
+        """
+        Run the pipeline with one OpenAI Batch API job per stage (scenarios, test cases, evaluations)
+        covering all detectors. Failed requests, or all requests of a failed job, are retried interactively.
+        The semantic cache is not used in this mode.
+        """
+        # Generate scenarios for all detectors
+        issue_descriptions = [self._get_issue_description(detector) for detector in detectors]
+        scenario_inputs = {
+            str(d): ScenarioInput(
                 description=description,
-                category=issue_description,
+                category=issue_descriptions[d],
                 scenarios_per_detector=scenarios_per_detector
             )
-            scenarios = self.scenario_generator.generate_scenarios(scenario_input)
-            
-            # Process each scenario
-            for r, scenario in enumerate(scenarios):
-                # Generate test cases
-                test_input = TestCaseInput(
+            for d in range(len(detectors))
+        }
+        print(f"Generating scenarios for {len(detectors)} detectors with the Batch API")
+        scenarios = await self._run_batch_job(self.scenario_generator.generate_scenarios_batch, scenario_inputs)
+        missing = list(scenario_inputs.keys() - scenarios.keys())
+        scenarios.update(zip(missing, await asyncio.gather(*[self._generate_scenarios(scenario_inputs[key]) for key in missing])))
+
+        # Collect the test inputs of every (detector, scenario), keyed "<detector>:<scenario>"
+        if examples:
+            test_examples, test_detectors = self._split_examples(examples, detectors)
+            test_messages = {
+                f"{d}:{r}": [
+                    test_example
+                    for test_example, test_detector in zip(test_examples, test_detectors)
+                    if detector in test_detector
+                ]
+                for d, detector in enumerate(detectors)
+                for r in range(len(scenarios[str(d)]))
+            }
+        else:
+            test_inputs = {
+                f"{d}:{r}": TestCaseInput(
                     description=description,
-                    category=issue_description,
+                    category=issue_descriptions[d],
                     scenario=scenario,
                     format_example=model_input_format,
                     languages=["English"],
                     num_inputs=test_cases_per_scenario
                 )
-                test_cases = self.test_generator.generate_test_cases(test_input)
-                
-                # Evaluate test cases
-                failed_tests = 0
-                with tqdm(test_cases["inputs"],
-                         desc=f"Evaluating {detector} scenario {r+1}/{len(scenarios)}") as pbar:
-                    for test_case in pbar:
-                        user_message = test_case["user_input"]
-                        app_response = response_model(user_message)
-                        
-                        # Evaluate the conversation
-                        eval_input = EvaluationInput(
-                            description=description,
-                            conversation=Conversation(
-                                user_message=user_message,
-                                app_response=app_response
-                            ),
-                            scenarios=[scenario]
-                        )
-                        evaluation = self.evaluator.evaluate_conversation(eval_input)
-                        
-                        # Store results
-                        results.append({
-                            "detector": detector,
-                            "scenario": scenario,
-                            "user_message": user_message,
-                            "app_response": app_response,
-                            "evaluation_score": "pass" if evaluation["eval_passed"] else "fail",
-                            "evaluation_reason": evaluation["reason"]
-                        })
-                        
-                        if not evaluation["eval_passed"]:
-                            failed_tests += 1
-                
-                # Report results for this scenario
-                total_tests = len(test_cases["inputs"])
-                if failed_tests > 0:
-                    print(f"{detector} scenario {r+1}: [bright_red]{failed_tests}/{total_tests} tests failed[/bright_red]")
-                else:
-                    print(f"{detector} scenario {r+1}: [green]All {total_tests} tests passed[/green]")
-                print('-'*100)
-
-        # Save results to a CSV file
-        results_df = pd.DataFrame(results)
-        save_path = self._save_results_to_csv(results_df, description)
-        self.save_path = save_path
+                for d in range(len(detectors))
+                for r, scenario in enumerate(scenarios[str(d)])
+            }
+            print(f"Generating test cases for {len(test_inputs)} scenarios with the Batch API")
+            test_cases = await self._run_batch_job(self.test_generator.generate_test_cases_batch, test_inputs)
+            missing = list(test_inputs.keys() - test_cases.keys())
+            test_cases.update(zip(missing, await asyncio.gather(*[self._generate_test_cases(test_inputs[key]) for key in missing])))
+            test_messages = {
+                key: [test_case["user_input"] for test_case in test_cases[key]["inputs"]]
+                for key in test_inputs
+            }
 
+        # Query the app with every test input, keyed "<detector>:<scenario>:<test case>"
+        async def get_app_response(user_message: str) -> Any:
+            async with self._semaphore:
+                return await self._get_app_response(response_model, user_message)
+
+        test_ids = [(key, i) for key, messages in test_messages.items() for i in range(len(messages))]
+        app_responses = await tqdm.gather(
+            *[get_app_response(test_messages[key][i]) for key, i in test_ids],
+            desc="Querying the app",
+            **self._progress_options(len(test_ids))
+        )
+        eval_inputs = {}
+        for (key, i), app_response in zip(test_ids, app_responses):
+            d, r = (int(part) for part in key.split(":"))
+            eval_inputs[f"{key}:{i}"] = self._evaluation_input(description, scenarios[str(d)][r], test_messages[key][i], app_response)
+        evaluations = await self._evaluate_batch(eval_inputs)
+
+        # Map the custom ids back to result rows, saved to a CSV file scenario by scenario
+        save_path = self._create_results_csv(description)
+        results = self._new_results()
+        for d, detector in enumerate(detectors):
+            for r, scenario in enumerate(scenarios[str(d)]):
+                key = f"{d}:{r}"
+                scenario_outcomes = [
+                    (eval_inputs[f"{key}:{i}"].conversation.app_response, evaluations[f"{key}:{i}"])
+                    for i in range(len(test_messages[key]))
+                ]
+                self._record_scenario(results, save_path, detector, r, scenario, test_messages[key], scenario_outcomes, with_examples=bool(examples))
+
+        results_df = self._finish_results_csv(save_path)
         return results_df, save_path
 
-        
     def run(
         self,
         description: str,
@@ -281,22 +744,61 @@ class RedTeaming:
         examples: Optional[List[str]] = None,
         model_input_format: Optional[Dict[str, Any]] = None,
         scenarios_per_detector: int = 4,
-        examples_per_scenario: int = 5 # used only if examples are not provided
+        examples_per_scenario: int = 5, # used only if examples are not provided
+        app_id: Optional[str] = None
     ) -> pd.DataFrame:
         """
         Run the complete red teaming pipeline.
+
+        Synchronous wrapper around `arun()`, see there for the arguments and return value.
+        """
+        async def run_and_close() -> pd.DataFrame:
+            # The HTTP client's connections are bound to this run's event loop
+            try:
+                return await self.arun(
+                    description=description,
+                    detectors=detectors,
+                    response_model=response_model,
+                    examples=examples,
+                    model_input_format=model_input_format,
+                    scenarios_per_detector=scenarios_per_detector,
+                    examples_per_scenario=examples_per_scenario,
+                    app_id=app_id
+                )
+            finally:
+                await self.aclose()
+
+        return self._run_coroutine(run_and_close())
+
+    async def arun(
+        self,
+        description: str,
+        detectors: List[str],
+        response_model: Any,
+        examples: Optional[List[str]] = None,
+        model_input_format: Optional[Dict[str, Any]] = None,
+        scenarios_per_detector: int = 4,
+        examples_per_scenario: int = 5, # used only if examples are not provided
+        app_id: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Run the complete red teaming pipeline, processing the test inputs of all detectors and scenarios concurrently.
+        Use the instance as an async context manager (or call `aclose()`) to close its HTTP connections afterwards.
         
         Args:
             description: Description of the app being tested
             detectors: List of detector names to test against (e.g., ["stereotypes", "harmful_content"])
-            response_model: Function that takes a user message and returns the app's response
+            response_model: Function (sync or async) that takes a user message and returns the app's response
             model_input_format: Format for test case generation
             examples: List of example inputs to test. If provided, uses these instead of generating test cases
             scenarios_per_detector: Number of test scenarios to generate per detector
             examples_per_scenario: Number of test cases to generate per scenario
+            app_id: Identifier of the app under test (e.g. name and version). App responses are only
+                cached when it is set, so change it whenever the app changes
             
         Returns:
-            DataFrame containing all test results with columns:
+            DataFrame read back from the results CSV, which is written incrementally as scenarios complete,
+            and the path of that CSV. The DataFrame contains all test results with columns:
             - scenario: The scenario being tested
             - user_message: The test input
             - app_response: The model's response
@@ -324,8 +826,14 @@ class RedTeaming:
                 raise ValueError('Detector must be a string or a dictionary with only key "custom" and a string as a value')
 
         self.validate_detectors(inbuild_detector)
+
+        # Created per run, as a semaphore is bound to the event loop it is first used in
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._app_id = app_id
+        self._in_flight = {}
+        self._ensure_http_client()
         
-        if examples:
-            return self._run_with_examples(description, detectors, response_model, examples, scenarios_per_detector)
-            
-        return self._run_without_examples(description, detectors, response_model, model_input_format, scenarios_per_detector, examples_per_scenario)
+        if self.use_batch_api:
+            return await self._run_with_batch_api(description, detectors, response_model, examples, model_input_format, scenarios_per_detector, examples_per_scenario)
+
+        return await self._run_detectors(description, detectors, response_model, examples, model_input_format, scenarios_per_detector, examples_per_scenario)
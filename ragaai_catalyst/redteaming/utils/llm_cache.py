@@ -0,0 +1,73 @@
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+import orjson
+
+
+class LLMCache:
+    """
+    Content-addressed cache for app responses and evaluations of the red teaming pipeline.
+
+    Entries are keyed on the SHA-256 of the canonical JSON request payload, so identical
+    calls (across detectors or repeated runs) become lookups instead of LLM calls. Entries
+    live in memory and, if `path` is given, are also appended to a JSON lines file which
+    is loaded again when a cache is created for the same path.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Optional JSON lines file used to persist the cache across runs
+        """
+        self.path = path
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries: Dict[str, Any] = {}
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Skip a partially written last line, e.g. after a crash
+                    continue
+                self._entries[entry["key"]] = entry["value"]
+
+    @staticmethod
+    def make_key(payload: Dict[str, Any]) -> str:
+        """Build the cache key of a request payload (dataclasses are serialized natively)."""
+        return hashlib.sha256(orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss."""
+        if key in self._entries:
+            self.stats["hits"] += 1
+            return self._entries[key]
+        self.stats["misses"] += 1
+        return None
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None, without counting a hit or miss."""
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        if self.path is not None:
+            with open(self.path, "ab") as f:
+                f.write(orjson.dumps({"key": key, "value": value}, default=str) + b"\n")
+
+    def clear(self) -> None:
+        """Drop all entries, including the persisted ones."""
+        self._entries.clear()
+        self.stats = {"hits": 0, "misses": 0}
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from typing import Any, Mapping, Optional
+
+# Completion budget reserved per request, matches LLMGenerator's default max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+
+def estimate_tokens(*texts: Any, completion_tokens: int = DEFAULT_COMPLETION_TOKENS) -> int:
+    """Roughly estimate the tokens a request consumes (~4 characters per prompt token plus the completion budget)."""
+    return sum(len(str(text)) for text in texts) // 4 + completion_tokens
+
+
+def _parse_header_number(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter bounding LLM calls by requests and tokens per minute.
+
+    Both buckets refill continuously, so short bursts up to a minute's quota are allowed
+    while the sustained rate stays within the configured limits. A limit set to None is
+    not enforced. The provider's rate limit headers can be fed back through
+    `update_from_headers` to stay in sync with the server-side quota.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._available_requests = float(requests_per_minute or 0)
+        self._available_tokens = float(tokens_per_minute or 0)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        # LLM calls and header updates may happen from worker threads
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_minute:
+            self._available_requests = min(
+                float(self.requests_per_minute),
+                self._available_requests + elapsed * self.requests_per_minute / 60
+            )
+        if self.tokens_per_minute:
+            self._available_tokens = min(
+                float(self.tokens_per_minute),
+                self._available_tokens + elapsed * self.tokens_per_minute / 60
+            )
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take capacity for one request if available, otherwise return the seconds to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._blocked_until:
+                return self._blocked_until - now
+
+            wait = 0.0
+            if self.requests_per_minute and self._available_requests < 1:
+                wait = max(wait, (1 - self._available_requests) * 60 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                # A single request larger than the whole bucket must still be let through eventually
+                tokens = min(tokens, self.tokens_per_minute)
+                if self._available_tokens < tokens:
+                    wait = max(wait, (tokens - self._available_tokens) * 60 / self.tokens_per_minute)
+            if wait > 0:
+                return wait
+
+            if self.requests_per_minute:
+                self._available_requests -= 1
+            if self.tokens_per_minute:
+                self._available_tokens -= tokens
+            return 0.0
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until a request consuming `tokens` tokens fits into the rate limits."""
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """
+        Adapt to the provider's view of the quota.
+
+        Understands the OpenAI style `x-ratelimit-remaining-requests`, `x-ratelimit-remaining-tokens`
+        and `retry-after` headers, also when prefixed with `llm_provider-` by LiteLLM.
+        """
+        if not headers:
+            return
+        headers = {str(key).lower(): value for key, value in headers.items()}
+
+        def get(name: str) -> Optional[float]:
+            value = headers.get(name, headers.get(f"llm_provider-{name}"))
+            return _parse_header_number(value)
+
+        remaining_requests = get("x-ratelimit-remaining-requests")
+        remaining_tokens = get("x-ratelimit-remaining-tokens")
+        retry_after = get("retry-after")
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if remaining_requests is not None and self.requests_per_minute:
+                self._available_requests = min(self._available_requests, remaining_requests)
+            if remaining_tokens is not None and self.tokens_per_minute:
+                self._available_tokens = min(self._available_tokens, remaining_tokens)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
@@ -0,0 +1,60 @@
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    In-memory embedding-similarity cache.
+
+    Reuses the value stored for a previous input whose embedding has a cosine similarity of at
+    least `threshold` with the new input, so paraphrased test prompts do not trigger new LLM calls.
+    Entries are grouped by namespace and lookups never cross namespaces. Search is an exact
+    inner product over L2-normalised embeddings, which is fast for the few hundred entries of a run.
+    """
+
+    def __init__(self, threshold: float = 0.97):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a cached value to be reused
+        """
+        self.threshold = threshold
+        self.stats = {"hits": 0, "misses": 0}
+        self._vectors: Dict[Hashable, List[np.ndarray]] = {}
+        self._matrices: Dict[Hashable, np.ndarray] = {}
+        self._values: Dict[Hashable, List[Any]] = {}
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _matrix(self, namespace: Hashable) -> Optional[np.ndarray]:
+        vectors = self._vectors.get(namespace)
+        if not vectors:
+            return None
+        matrix = self._matrices.get(namespace)
+        if matrix is None or len(matrix) != len(vectors):
+            matrix = np.stack(vectors)
+            self._matrices[namespace] = matrix
+        return matrix
+
+    def lookup(self, namespace: Hashable, embedding: Sequence[float]) -> Optional[Any]:
+        """Return the value of the most similar cached input, or None if none is similar enough."""
+        matrix = self._matrix(namespace)
+        if matrix is not None:
+            scores = matrix @ self._normalize(embedding)
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                self.stats["hits"] += 1
+                return self._values[namespace][best]
+        self.stats["misses"] += 1
+        return None
+
+    def add(self, namespace: Hashable, embedding: Sequence[float], value: Any) -> None:
+        self._vectors.setdefault(namespace, []).append(self._normalize(embedding))
+        self._values.setdefault(namespace, []).append(value)
+
+    def __len__(self) -> int:
+        return sum(len(values) for values in self._values.values())
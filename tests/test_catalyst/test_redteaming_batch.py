@@ -0,0 +1,204 @@
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from ragaai_catalyst.redteaming import LLMCache, RedTeaming
+from ragaai_catalyst.redteaming import llm_generator as llm_generator_module
+from ragaai_catalyst.redteaming.evaluator import Conversation, EvaluationInput, Evaluator
+from ragaai_catalyst.redteaming.llm_generator import LLMGenerator
+
+DETECTORS = ["stereotypes", "harmful_content"]
+
+
+def batch_output_line(custom_id, content=None, status_code=200, error=None):
+    response = None
+    if content is not None:
+        response = {"status_code": status_code, "body": {"choices": [{"message": {"content": content}}]}}
+    return json.dumps({"custom_id": custom_id, "response": response, "error": error})
+
+
+@pytest.fixture
+def openai_client(monkeypatch):
+    """Mocked OpenAI client of a batch job which completes after one status check."""
+    client = Mock()
+    client.files.create.return_value = Mock(id="file-input")
+    client.batches.create.return_value = Mock(id="batch-1", status="in_progress")
+    client.batches.retrieve.return_value = Mock(id="batch-1", status="completed", output_file_id="file-output")
+    openai = Mock(return_value=client)
+    monkeypatch.setattr(llm_generator_module, "OpenAI", openai)
+    monkeypatch.setattr(llm_generator_module.time, "sleep", lambda seconds: None)
+    client.openai = openai
+    return client
+
+
+def test_generate_batch_responses(openai_client):
+    openai_client.files.content.return_value = Mock(text="\n".join([
+        batch_output_line("a", '{"x": 1}'),
+        batch_output_line("b", '```json\n{"x": 2}\n```'),
+        batch_output_line("c", error={"message": "failed"}),
+        batch_output_line("d", '{"x": 4}', status_code=500),
+        batch_output_line("e", "not json"),
+        "",
+    ]))
+    generator = LLMGenerator(api_key="test-key", api_base="https://proxy.example/v1", model_name="gpt-4o", temperature=0.2)
+    prompts = {key: ("system", f"user {key}") for key in "abcde"}
+
+    responses = generator.generate_batch_responses(prompts, max_tokens=100, poll_interval=0)
+
+    assert responses == {"a": {"x": 1}, "b": {"x": 2}}
+    assert openai_client.openai.call_args.kwargs["base_url"] == "https://proxy.example/v1"
+    file_name, content = openai_client.files.create.call_args.kwargs["file"]
+    lines = [json.loads(line) for line in content.splitlines()]
+    assert [line["custom_id"] for line in lines] == list("abcde")
+    assert lines[0]["url"] == "/v1/chat/completions"
+    assert lines[0]["body"]["model"] == "gpt-4o"
+    assert lines[0]["body"]["temperature"] == 0.2
+    assert lines[0]["body"]["max_tokens"] == 100
+    assert lines[0]["body"]["messages"] == [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "user a"}
+    ]
+    assert openai_client.batches.create.call_args.kwargs["input_file_id"] == "file-input"
+
+
+@pytest.mark.parametrize("status", ["failed", "expired", "cancelled"])
+def test_generate_batch_responses_failed_job(openai_client, status):
+    openai_client.batches.retrieve.return_value = Mock(id="batch-1", status=status, output_file_id=None)
+    generator = LLMGenerator(api_key="test-key")
+    with pytest.raises(Exception, match=status):
+        generator.generate_batch_responses({"a": ("system", "user")}, poll_interval=0)
+
+
+def test_generate_batch_responses_requires_openai():
+    generator = LLMGenerator(api_key="test-key", provider="xai")
+    with pytest.raises(ValueError, match="openai"):
+        generator.generate_batch_responses({"a": ("system", "user")})
+
+
+def test_batch_responses_are_validated():
+    evaluator = Evaluator(api_key="test-key")
+    evaluator.llm_generator.generate_batch_responses = Mock(return_value={
+        "a": {"eval_passed": True, "reason": "ok"},
+        "b": {"eval_passed": "yes", "reason": "not a boolean"},
+        "c": ["not", "a", "dict"],
+    })
+    eval_inputs = {
+        key: EvaluationInput(
+            description="A job recommendation app",
+            conversation=Conversation(user_message=f"message {key}", app_response="response"),
+            scenarios=["The app should not discriminate"]
+        )
+        for key in "abc"
+    }
+
+    assert evaluator.evaluate_conversations_batch(eval_inputs, poll_interval=0) == {"a": {"eval_passed": True, "reason": "ok"}}
+    prompts = evaluator.llm_generator.generate_batch_responses.call_args.args[0]
+    assert prompts["b"] == (evaluator.system_prompt, evaluator._create_input_template(eval_inputs["b"]))
+
+
+async def generate_test_cases(test_input):
+    return {"inputs": [{"user_input": f"{test_input.scenario} input {i}"} for i in range(test_input.num_inputs)]}
+
+
+def generate_scenarios_batch(inputs, poll_interval):
+    # Detector 1 fails within the batch job
+    return {key: [f"scenario {key}-{r}" for r in range(2)] for key in inputs if key != "1"}
+
+
+def generate_test_cases_batch(inputs, poll_interval):
+    # Scenario 0:1 fails within the batch job
+    return {
+        key: {"inputs": [{"user_input": f"{test_input.scenario} input {i}"} for i in range(test_input.num_inputs)]}
+        for key, test_input in inputs.items()
+        if key != "0:1"
+    }
+
+
+def evaluate_conversations_batch(inputs, poll_interval):
+    # Only the first test case of each scenario succeeds within the batch job
+    return {
+        key: {"eval_passed": False, "reason": f"{key}|{eval_input.scenarios[0]}|{eval_input.conversation.user_message}"}
+        for key, eval_input in inputs.items()
+        if key.endswith(":0")
+    }
+
+
+@pytest.fixture
+def red_teaming(monkeypatch, tmp_path):
+    """RedTeaming instance using the Batch API, with mocked LLM calls."""
+    monkeypatch.setattr(RedTeaming, "_get_save_path", lambda self, description: str(tmp_path / "results.csv"))
+    rt = RedTeaming(api_key="test-key", provider="openai", model_name="gpt-4-1106-preview", use_batch_api=True, batch_poll_interval=0)
+    rt.scenario_generator.generate_scenarios_batch = Mock(side_effect=generate_scenarios_batch)
+    rt.test_generator.generate_test_cases_batch = Mock(side_effect=generate_test_cases_batch)
+    rt.evaluator.evaluate_conversations_batch = Mock(side_effect=evaluate_conversations_batch)
+    rt.scenario_generator.agenerate_scenarios = AsyncMock(return_value=["fallback scenario A", "fallback scenario B"])
+    rt.test_generator.agenerate_test_cases = AsyncMock(side_effect=generate_test_cases)
+    rt.evaluator.aevaluate_conversation = AsyncMock(return_value={"eval_passed": True, "reason": "interactive"})
+    return rt
+
+
+def run(red_teaming):
+    return red_teaming.run(
+        description="A job recommendation app",
+        detectors=DETECTORS,
+        response_model=lambda user_message: f"response to {user_message}",
+        scenarios_per_detector=2,
+        examples_per_scenario=2
+    )
+
+
+def test_batch_results_map_back_to_rows(red_teaming):
+    df, _ = run(red_teaming)
+
+    assert len(df) == len(DETECTORS) * 2 * 2
+    assert (df["app_response"] == "response to " + df["user_message"]).all()
+    assert set(df.loc[df["detector"] == "stereotypes", "scenario"]) == {"scenario 0-0", "scenario 0-1"}
+    assert set(df.loc[df["detector"] == "harmful_content", "scenario"]) == {"fallback scenario A", "fallback scenario B"}
+
+    batch_rows = df[df["evaluation_reason"] != "interactive"]
+    assert len(batch_rows) == len(DETECTORS) * 2
+    for row in batch_rows.itertuples():
+        key, scenario, user_message = row.evaluation_reason.split("|")
+        d, r, i = (int(part) for part in key.split(":"))
+        assert (row.detector, row.scenario, row.user_message) == (DETECTORS[d], scenario, user_message)
+        assert row.user_message == f"{row.scenario} input {i}"
+        assert row.evaluation_score == "fail"
+    assert (df.loc[df["evaluation_reason"] == "interactive", "evaluation_score"] == "pass").all()
+
+
+def test_failed_batch_requests_fall_back_to_interactive_calls(red_teaming):
+    run(red_teaming)
+
+    red_teaming.scenario_generator.agenerate_scenarios.assert_awaited_once()
+    red_teaming.test_generator.agenerate_test_cases.assert_awaited_once()
+    assert red_teaming.test_generator.agenerate_test_cases.await_args.args[0].scenario == "scenario 0-1"
+    assert red_teaming.evaluator.aevaluate_conversation.await_count == len(DETECTORS) * 2
+
+
+def test_failed_batch_job_falls_back_to_interactive_calls(red_teaming):
+    expired = Exception("Batch batch-1 finished with status 'expired'")
+    red_teaming.scenario_generator.generate_scenarios_batch.side_effect = expired
+    red_teaming.test_generator.generate_test_cases_batch.side_effect = expired
+    red_teaming.evaluator.evaluate_conversations_batch.side_effect = expired
+
+    df, _ = run(red_teaming)
+
+    assert len(df) == len(DETECTORS) * 2 * 2
+    assert red_teaming.scenario_generator.agenerate_scenarios.await_count == len(DETECTORS)
+    assert red_teaming.test_generator.agenerate_test_cases.await_count == len(DETECTORS) * 2
+    assert red_teaming.evaluator.aevaluate_conversation.await_count == len(df)
+
+
+def test_batch_cache_misses_are_counted_once(red_teaming):
+    red_teaming.cache = LLMCache()
+    red_teaming.evaluator.evaluate_conversations_batch.side_effect = lambda inputs, poll_interval: {}
+
+    df, _ = run(red_teaming)
+    assert red_teaming.cache.stats == {"hits": 0, "misses": len(df)}
+
+    # A second run finds all evaluations in the cache
+    red_teaming.evaluator.aevaluate_conversation.reset_mock()
+    df, _ = run(red_teaming)
+    assert red_teaming.cache.stats == {"hits": len(df), "misses": len(df)}
+    red_teaming.evaluator.aevaluate_conversation.assert_not_awaited()
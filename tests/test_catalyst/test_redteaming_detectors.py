@@ -0,0 +1,26 @@
+import pytest
+
+from ragaai_catalyst.redteaming import RedTeaming
+from ragaai_catalyst.redteaming import red_teaming as red_teaming_module
+
+
+@pytest.fixture(autouse=True)
+def clear_detectors_cache():
+    RedTeaming._load_supported_detectors.cache_clear()
+    yield
+    RedTeaming._load_supported_detectors.cache_clear()
+
+
+def test_supported_detectors():
+    rt = RedTeaming(api_key="test-key")
+    assert "stereotypes" in rt.get_supported_detectors()
+    assert rt.get_supported_detectors() == sorted(rt.get_supported_detectors())
+
+
+def test_failed_load_is_not_cached(monkeypatch, tmp_path):
+    config_path = red_teaming_module._CONFIG_PATH
+    monkeypatch.setattr(red_teaming_module, "_CONFIG_PATH", tmp_path / "missing.toml")
+    assert RedTeaming(api_key="test-key").get_supported_detectors() == []
+
+    monkeypatch.setattr(red_teaming_module, "_CONFIG_PATH", config_path)
+    assert "stereotypes" in RedTeaming(api_key="test-key").get_supported_detectors()
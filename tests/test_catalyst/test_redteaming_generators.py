@@ -0,0 +1,63 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from ragaai_catalyst.redteaming.data_generator.scenario_generator import ScenarioGenerator, ScenarioInput
+# Imported through the module, so that pytest does not collect the Test* classes
+from ragaai_catalyst.redteaming.data_generator import test_case_generator
+from ragaai_catalyst.redteaming.evaluator import Conversation, EvaluationInput, Evaluator
+
+SCENARIO_INPUT = ScenarioInput(description="A job recommendation app", category="Stereotypes", scenarios_per_detector=2)
+TEST_CASE_INPUT = test_case_generator.TestCaseInput(
+    description="A job recommendation app",
+    category="Stereotypes",
+    scenario="The app should not discriminate",
+    format_example={"user_input": "Hi"},
+    languages=["English"],
+    num_inputs=2
+)
+EVALUATION_INPUT = EvaluationInput(
+    description="A job recommendation app",
+    conversation=Conversation(user_message="Recommend a job", app_response="I cannot help with that"),
+    scenarios=["The app should not discriminate"]
+)
+
+
+def mock_llm(generator, response):
+    generator.llm_generator.generate_response = Mock(return_value=response)
+    generator.llm_generator.agenerate_response = AsyncMock(return_value=response)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_generate_scenarios(use_async):
+    generator = ScenarioGenerator(api_key="test-key")
+    mock_llm(generator, {"requirements": [" scenario 1 ", "", "scenario 2"]})
+    if use_async:
+        scenarios = asyncio.run(generator.agenerate_scenarios(SCENARIO_INPUT))
+    else:
+        scenarios = generator.generate_scenarios(SCENARIO_INPUT)
+    assert scenarios == ["scenario 1", "scenario 2"]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_generate_test_cases_rejects_wrong_format(use_async):
+    generator = test_case_generator.TestCaseGenerator(api_key="test-key")
+    mock_llm(generator, {"inputs": [{"user_name": "John"}]})
+    with pytest.raises(Exception, match="^Failed to generate test cases: Test case keys"):
+        if use_async:
+            asyncio.run(generator.agenerate_test_cases(TEST_CASE_INPUT))
+        else:
+            generator.generate_test_cases(TEST_CASE_INPUT)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_evaluate_conversation_wraps_llm_errors(use_async):
+    evaluator = Evaluator(api_key="test-key")
+    evaluator.llm_generator.generate_response = Mock(side_effect=Exception("Error generating LLM response: boom"))
+    evaluator.llm_generator.agenerate_response = AsyncMock(side_effect=Exception("Error generating LLM response: boom"))
+    with pytest.raises(Exception, match="^Failed to evaluate conversation: Error generating LLM response: boom$"):
+        if use_async:
+            asyncio.run(evaluator.aevaluate_conversation(EVALUATION_INPUT))
+        else:
+            evaluator.evaluate_conversation(EVALUATION_INPUT)
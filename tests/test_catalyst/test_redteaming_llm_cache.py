@@ -0,0 +1,92 @@
+import asyncio
+
+from ragaai_catalyst.redteaming import LLMCache, RedTeaming
+from ragaai_catalyst.redteaming.evaluator import Conversation, EvaluationInput
+
+
+def make_eval_input(app_response="I cannot help with that"):
+    return EvaluationInput(
+        description="A job recommendation app",
+        conversation=Conversation(user_message="Recommend a job", app_response=app_response),
+        scenarios=["The app should not discriminate"]
+    )
+
+
+def test_make_key_is_stable():
+    key = LLMCache.make_key({"model": "gpt", "messages": ["a", "b"], "temperature": 0})
+    assert key == LLMCache.make_key({"temperature": 0, "messages": ["a", "b"], "model": "gpt"})
+    assert key != LLMCache.make_key({"model": "gpt", "messages": ["b", "a"], "temperature": 0})
+
+
+def test_make_key_serializes_dataclasses():
+    key = LLMCache.make_key({"messages": [make_eval_input()]})
+    assert key == LLMCache.make_key({"messages": [make_eval_input()]})
+    assert key != LLMCache.make_key({"messages": [make_eval_input("Sure, here you go")]})
+
+
+def test_get_set_and_stats():
+    cache = LLMCache()
+    assert cache.get("key") is None
+    cache.set("key", {"eval_passed": True, "reason": "ok"})
+    assert cache.get("key") == {"eval_passed": True, "reason": "ok"}
+    assert cache.stats == {"hits": 1, "misses": 1}
+    assert len(cache) == 1
+
+
+def test_peek_does_not_count():
+    cache = LLMCache()
+    cache.set("key", "value")
+    assert cache.peek("key") == "value"
+    assert cache.peek("other") is None
+    assert cache.stats == {"hits": 0, "misses": 0}
+
+
+def test_reload_from_file(tmp_path):
+    path = str(tmp_path / "cache.jsonl")
+    cache = LLMCache(path=path)
+    cache.set("a", "response")
+    cache.set("b", {"eval_passed": False, "reason": "biased"})
+
+    reloaded = LLMCache(path=path)
+    assert len(reloaded) == 2
+    assert reloaded.get("a") == "response"
+    assert reloaded.get("b") == {"eval_passed": False, "reason": "biased"}
+
+
+def test_reload_skips_truncated_last_line(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    cache = LLMCache(path=str(path))
+    cache.set("a", "response")
+    with open(path, "ab") as f:
+        f.write(b'{"key": "b", "val')
+
+    reloaded = LLMCache(path=str(path))
+    assert len(reloaded) == 1
+    assert reloaded.get("a") == "response"
+
+
+def test_clear_removes_file(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    cache = LLMCache(path=str(path))
+    cache.set("a", "response")
+    cache.clear()
+    assert len(cache) == 0
+    assert not path.exists()
+
+
+def test_app_responses_only_cached_with_app_id():
+    calls = []
+
+    def response_model(user_message):
+        calls.append(user_message)
+        return f"response {len(calls)}"
+
+    rt = RedTeaming(api_key="test-key", cache=LLMCache())
+
+    async def get_twice(app_id):
+        rt._app_id = app_id
+        return [await rt._get_app_response(response_model, "hi") for _ in range(2)]
+
+    assert asyncio.run(get_twice(None)) == ["response 1", "response 2"]
+    assert asyncio.run(get_twice("app-v1")) == ["response 3", "response 3"]
+    assert asyncio.run(get_twice("app-v2")) == ["response 4", "response 4"]
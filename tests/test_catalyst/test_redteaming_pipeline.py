@@ -0,0 +1,247 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pandas as pd
+import pytest
+
+from ragaai_catalyst.redteaming import LLMCache, RedTeaming
+from ragaai_catalyst.redteaming.red_teaming import RESULT_COLUMNS
+from ragaai_catalyst.redteaming.utils.semantic_cache import SemanticCache
+
+DETECTORS = ["stereotypes", "harmful_content"]
+
+
+async def generate_test_cases(test_input):
+    return {"inputs": [{"user_input": f"{test_input.scenario} input {i}"} for i in range(test_input.num_inputs)]}
+
+
+async def evaluate_conversation(eval_input):
+    passed = "unsafe" not in eval_input.conversation.app_response
+    return {"eval_passed": passed, "reason": "ok" if passed else "unsafe response"}
+
+
+def response_model(user_message):
+    return f"unsafe answer to {user_message}" if user_message.endswith("input 0") else "I cannot help with that"
+
+
+async def async_response_model(user_message):
+    return response_model(user_message)
+
+
+@pytest.fixture
+def red_teaming(monkeypatch, tmp_path):
+    """RedTeaming instance with mocked LLM calls, saving its results to a temporary directory."""
+    monkeypatch.setattr(RedTeaming, "_get_save_path", lambda self, description: str(tmp_path / "results.csv"))
+    rt = RedTeaming(api_key="test-key", max_concurrency=3)
+    rt.scenario_generator.agenerate_scenarios = AsyncMock(side_effect=lambda scenario_input: ["scenario A", "scenario B"])
+    rt.test_generator.agenerate_test_cases = AsyncMock(side_effect=generate_test_cases)
+    rt.evaluator.aevaluate_conversation = AsyncMock(side_effect=evaluate_conversation)
+    return rt
+
+
+@pytest.fixture
+def flushes(monkeypatch):
+    """Record the rows written by every flush of the results CSV."""
+    flushed = []
+    flush_results = RedTeaming._flush_results
+
+    def record_flush(results, save_path):
+        flushed.append(list(zip(results["detector"], results["scenario"])))
+        flush_results(results, save_path)
+
+    monkeypatch.setattr(RedTeaming, "_flush_results", staticmethod(record_flush))
+    return flushed
+
+
+@pytest.mark.parametrize("model", [response_model, async_response_model])
+def test_every_test_case_is_processed_once(red_teaming, model):
+    df, save_path = red_teaming.run(
+        description="A job recommendation app",
+        detectors=DETECTORS,
+        response_model=model,
+        scenarios_per_detector=2,
+        examples_per_scenario=3
+    )
+
+    assert tuple(df.columns) == RESULT_COLUMNS
+    assert len(df) == len(DETECTORS) * 2 * 3
+    assert not df.duplicated(["detector", "scenario", "user_message"]).any()
+    for detector in DETECTORS:
+        for scenario in ["scenario A", "scenario B"]:
+            rows = df[(df["detector"] == detector) & (df["scenario"] == scenario)]
+            assert sorted(rows["user_message"]) == [f"{scenario} input {i}" for i in range(3)]
+    assert (df["evaluation_score"] == "fail").sum() == len(DETECTORS) * 2
+    assert red_teaming.evaluator.aevaluate_conversation.await_count == len(df)
+
+
+def test_results_are_flushed_per_scenario(red_teaming, flushes):
+    df, save_path = red_teaming.run(
+        description="A job recommendation app",
+        detectors=DETECTORS,
+        response_model=response_model,
+        scenarios_per_detector=2,
+        examples_per_scenario=3
+    )
+
+    assert len(flushes) == len(DETECTORS) * 2
+    for rows in flushes:
+        assert len(rows) == 3
+        assert len(set(rows)) == 1
+    assert sorted(rows[0] for rows in flushes) == sorted(
+        (detector, scenario) for detector in DETECTORS for scenario in ["scenario A", "scenario B"]
+    )
+    assert red_teaming.save_path == save_path
+
+
+def test_examples_are_tested_with_their_detectors(red_teaming):
+    examples = [
+        {"input": "example 1", "detectors": ["stereotypes"]},
+        {"input": "example 2", "detectors": DETECTORS},
+    ]
+    df, _ = red_teaming.run(
+        description="A job recommendation app",
+        detectors=DETECTORS,
+        response_model=response_model,
+        examples=examples,
+        scenarios_per_detector=2
+    )
+
+    red_teaming.test_generator.agenerate_test_cases.assert_not_awaited()
+    counts = df.groupby("detector", observed=True)["user_message"].count().to_dict()
+    assert counts == {"stereotypes": 2 * 2, "harmful_content": 1 * 2}
+
+
+def test_concurrent_identical_requests_share_one_call(red_teaming):
+    app_calls = []
+
+    async def slow_response_model(user_message):
+        app_calls.append(user_message)
+        await asyncio.sleep(0.01)
+        return f"unsafe answer to {user_message}"
+
+    red_teaming.cache = LLMCache()
+    df, _ = red_teaming.run(
+        description="A job recommendation app",
+        detectors=DETECTORS,
+        response_model=slow_response_model,
+        examples=["example 1", "example 2"],
+        scenarios_per_detector=2,
+        app_id="v1"
+    )
+
+    assert len(df) == 2 * 2 * len(DETECTORS)
+    assert sorted(app_calls) == ["example 1", "example 2"]
+    # Both detectors get the same two scenarios from the mocked generator
+    assert red_teaming.evaluator.aevaluate_conversation.await_count == 2 * 2
+    assert red_teaming._in_flight == {}
+
+
+def test_semantic_cache_reuses_concurrent_paraphrases(red_teaming):
+    app_calls = []
+
+    async def slow_response_model(user_message):
+        app_calls.append(user_message)
+        await asyncio.sleep(0.01)
+        return f"unsafe answer to {user_message}"
+
+    async def embed(text, embedding_model):
+        await asyncio.sleep(0)
+        # All inputs of a scenario are paraphrases of each other
+        return [1.0, 0.0] if text.startswith("scenario A") else [0.0, 1.0]
+
+    red_teaming.max_concurrency = 10
+    red_teaming._semantic_cache = SemanticCache(threshold=0.9)
+    red_teaming.evaluator.llm_generator.aget_embedding = AsyncMock(side_effect=embed)
+    df, _ = red_teaming.run(
+        description="A job recommendation app",
+        detectors=DETECTORS,
+        response_model=slow_response_model,
+        scenarios_per_detector=2,
+        examples_per_scenario=5
+    )
+
+    # One app call and evaluation per (detector, scenario), the other paraphrases reuse them
+    assert len(df) == len(DETECTORS) * 2 * 5
+    assert len(app_calls) == len(DETECTORS) * 2
+    assert red_teaming.evaluator.aevaluate_conversation.await_count == len(DETECTORS) * 2
+    assert red_teaming._semantic_cache.stats == {"hits": len(DETECTORS) * 2 * 4, "misses": len(DETECTORS) * 2}
+    for _, rows in df.groupby(["detector", "scenario"], observed=True):
+        assert rows["app_response"].nunique() == 1
+
+
+def assert_generators_use(red_teaming, http_client):
+    for generator in (red_teaming.scenario_generator, red_teaming.test_generator, red_teaming.evaluator):
+        assert generator.llm_generator.http_client is http_client
+        assert generator.llm_generator._async_openai_client()._client is http_client
+
+
+def test_run_twice_recreates_the_http_client(red_teaming):
+    first_client = red_teaming._http_client
+    assert_generators_use(red_teaming, first_client)
+    for _ in range(2):
+        df, _ = red_teaming.run(
+            description="A job recommendation app",
+            detectors=DETECTORS,
+            response_model=response_model,
+            scenarios_per_detector=2,
+            examples_per_scenario=3
+        )
+        assert len(df) == len(DETECTORS) * 2 * 3
+        assert red_teaming._http_client.is_closed
+
+    assert red_teaming._http_client is not first_client
+    assert_generators_use(red_teaming, red_teaming._http_client)
+
+
+def test_arun_after_aclose(red_teaming):
+    async def run_after_close():
+        await red_teaming.aclose()
+        closed_client = red_teaming._http_client
+        async with red_teaming:
+            df, _ = await red_teaming.arun(
+                description="A job recommendation app",
+                detectors=DETECTORS,
+                response_model=async_response_model,
+                scenarios_per_detector=2,
+                examples_per_scenario=3
+            )
+            assert not red_teaming._http_client.is_closed
+            assert red_teaming._http_client is not closed_client
+            assert_generators_use(red_teaming, red_teaming._http_client)
+        return df
+
+    assert len(asyncio.run(run_after_close())) == len(DETECTORS) * 2 * 3
+    assert red_teaming._http_client.is_closed
+
+
+def test_results_round_trip_as_text(red_teaming):
+    df, _ = red_teaming.run(
+        description="A job recommendation app",
+        detectors=["stereotypes"],
+        response_model=lambda user_message: "007",
+        examples=["1", "2", ""],
+        scenarios_per_detector=2
+    )
+
+    assert list(df["user_message"]) == ["1", "2", ""] * 2
+    assert list(df["app_response"]) == ["007"] * 6
+    assert list(df["evaluation_reason"]) == ["ok"] * 6
+    assert df["detector"].dtype == "category"
+
+
+def test_print_detector_summary(capsys):
+    df = pd.DataFrame({
+        "detector": ["stereotypes", "stereotypes", "harmful_content", "unused"],
+        "evaluation_score": ["pass", "fail", "pass", "pass"],
+    }).astype("category")
+    RedTeaming._print_detector_summary(df[df["detector"] != "unused"])
+
+    output = capsys.readouterr().out
+    assert "stereotypes: 1/2 passed (50.0%)" in output
+    assert "harmful_content: 1/1 passed (100.0%)" in output
+    assert "unused" not in output
+
+
+def test_print_detector_summary_empty(capsys):
+    RedTeaming._print_detector_summary(pd.DataFrame(columns=RESULT_COLUMNS))
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from ragaai_catalyst.redteaming.utils import rate_limiter as rate_limiter_module
+from ragaai_catalyst.redteaming.utils.rate_limiter import RateLimiter, estimate_tokens
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module.time, "monotonic", clock)
+    return clock
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("a" * 400, completion_tokens=0) == 100
+    assert estimate_tokens("a" * 40, "b" * 40) == 20 + 1000
+
+
+def test_no_limits_never_wait(clock):
+    limiter = RateLimiter()
+    for _ in range(1000):
+        assert limiter._try_acquire(10**6) == 0
+
+
+def test_request_bucket_wait(clock):
+    limiter = RateLimiter(requests_per_minute=60)
+    for _ in range(60):
+        assert limiter._try_acquire(0) == 0
+    # One request per second refills
+    assert limiter._try_acquire(0) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert limiter._try_acquire(0) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert limiter._try_acquire(0) == 0
+
+
+def test_token_bucket_wait(clock):
+    limiter = RateLimiter(tokens_per_minute=600)
+    assert limiter._try_acquire(600) == 0
+    # 10 tokens per second refill
+    assert limiter._try_acquire(60) == pytest.approx(6.0)
+    clock.now += 6
+    assert limiter._try_acquire(60) == 0
+
+
+def test_oversized_request_is_let_through(clock):
+    limiter = RateLimiter(tokens_per_minute=100)
+    assert limiter._try_acquire(1000) == 0
+    assert limiter._try_acquire(1000) == pytest.approx(60.0)
+
+
+def test_update_from_headers_remaining(clock):
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=6000)
+    limiter.update_from_headers({"X-RateLimit-Remaining-Requests": "0", "x-ratelimit-remaining-tokens": "6000"})
+    assert limiter._try_acquire(0) == pytest.approx(1.0)
+
+
+def test_update_from_headers_retry_after(clock):
+    limiter = RateLimiter(requests_per_minute=60)
+    limiter.update_from_headers({"llm_provider-retry-after": "5"})
+    assert limiter._try_acquire(0) == pytest.approx(5.0)
+    clock.now += 5
+    assert limiter._try_acquire(0) == 0
+
+
+def test_update_from_headers_ignores_invalid_values(clock):
+    limiter = RateLimiter(requests_per_minute=60)
+    limiter.update_from_headers(None)
+    limiter.update_from_headers({"x-ratelimit-remaining-requests": "n/a", "retry-after": ""})
+    assert limiter._try_acquire(0) == 0
+
+
+def test_acquire_sleeps_until_capacity(clock, monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(rate_limiter_module.asyncio, "sleep", fake_sleep)
+    limiter = RateLimiter(requests_per_minute=60)
+
+    async def acquire_all():
+        for _ in range(61):
+            await limiter.acquire()
+
+    asyncio.run(acquire_all())
+    assert sleeps == [pytest.approx(1.0)]
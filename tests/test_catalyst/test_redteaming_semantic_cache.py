@@ -0,0 +1,51 @@
+import pytest
+
+from ragaai_catalyst.redteaming import RedTeaming
+from ragaai_catalyst.redteaming.utils.semantic_cache import SemanticCache
+
+
+def test_lookup_empty_cache():
+    cache = SemanticCache(threshold=0.9)
+    assert cache.lookup("ns", [1.0, 0.0]) is None
+    assert cache.stats == {"hits": 0, "misses": 1}
+
+
+def test_threshold():
+    cache = SemanticCache(threshold=0.9)
+    cache.add("ns", [1.0, 0.0], "value")
+    # Similarity does not depend on the vector length
+    assert cache.lookup("ns", [2.0, 0.0]) == "value"
+    # cos = 0.95
+    assert cache.lookup("ns", [0.95, 0.3122]) == "value"
+    # cos = 0.8
+    assert cache.lookup("ns", [0.8, 0.6]) is None
+    assert cache.stats == {"hits": 2, "misses": 1}
+
+
+def test_returns_most_similar_value():
+    cache = SemanticCache(threshold=0.5)
+    cache.add("ns", [1.0, 0.0], "x")
+    cache.add("ns", [0.0, 1.0], "y")
+    assert cache.lookup("ns", [0.2, 0.9]) == "y"
+    assert cache.lookup("ns", [0.9, 0.2]) == "x"
+    assert len(cache) == 2
+
+
+def test_namespace_isolation():
+    cache = SemanticCache(threshold=0.9)
+    cache.add(("stereotypes", "scenario 1"), [1.0, 0.0], "value")
+    assert cache.lookup(("stereotypes", "scenario 2"), [1.0, 0.0]) is None
+    assert cache.lookup(("harmful_content", "scenario 1"), [1.0, 0.0]) is None
+    assert cache.lookup(("stereotypes", "scenario 1"), [1.0, 0.0]) == "value"
+
+
+def test_zero_vector():
+    cache = SemanticCache(threshold=0.9)
+    cache.add("ns", [0.0, 0.0], "value")
+    assert cache.lookup("ns", [0.0, 0.0]) is None
+
+
+def test_rejects_openai_embedding_model_for_xai():
+    with pytest.raises(ValueError, match="OpenAI embedding model"):
+        RedTeaming(api_key="test-key", provider="xai", semantic_threshold=0.97)
+    RedTeaming(api_key="test-key", provider="openai", model_name="gpt-4-1106-preview", semantic_threshold=0.97)